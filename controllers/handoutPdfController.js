@@ -137,7 +137,7 @@ const createLectures = async (req, res) => {
       [COURSE_ID]
     );
 
-    const existingTitles = existingLectures.map((lec) => lec.title.trim().toLowerCase());
+    const existingTitles = new Set(existingLectures.map((lec) => lec.title.trim().toLowerCase()));
 
     // Prepare new values — skip duplicates (same title for same course)
     const newLectures = Object.entries(lectures).filter(([title, data]) => {
@@ -146,8 +146,11 @@ const createLectures = async (req, res) => {
       // If lecture has a course_id and it mismatches the one in params → skip
       if (data.course_id && parseInt(data.course_id, 10) !== COURSE_ID) return false;
 
-      // Skip if the same title already exists for this course
-      return !existingTitles.includes(title.trim().toLowerCase());
+      // Skip if the same title already exists for this course (or earlier in this payload)
+      const key = title.trim().toLowerCase();
+      if (existingTitles.has(key)) return false;
+      existingTitles.add(key);
+      return true;
     });
 
     if (newLectures.length === 0) {
@@ -159,17 +162,16 @@ const createLectures = async (req, res) => {
 
     console.log("COURSE ID : ", COURSE_ID)
 
-    // Prepare SQL for bulk insert
-    const values = newLectures.map(([title, { start_page, end_page }]) => {
-      return `(${COURSE_ID}, ${db.escape(title)}, 0, ${start_page}, ${end_page})`;
-    });
+    // Prepare parameterized SQL for bulk insert
+    const placeholders = newLectures.map(() => "(?, ?, 0, ?, ?)").join(", ");
+    const params = newLectures.flatMap(([title, { start_page, end_page }]) => [COURSE_ID, title, start_page, end_page]);
 
     const sql = `
       INSERT INTO lectures (course_id, title, total_questions, start_page, end_page)
-      VALUES ${values.join(",\n")};
+      VALUES ${placeholders};
     `;
 
-    await db.execute(sql);
+    await db.query(sql, params);
 
     res.json({
       success: true,
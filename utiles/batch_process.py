@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+"""
+Run the handout scripts over a whole directory (or manifest) of PDFs.
+
+Usage:
+    python batch_process.py <dir|manifest> <output_dir> [--ops clean,text,lectures,info]
+                            [--workers N] [--timeout SECONDS] [--ocr] [--force]
+
+Each operation runs the existing script (process_pdf.py, parse_pdf.py,
+pdf_utils.py) in its own subprocess, at most --workers at a time, and is
+killed (with any OCR workers it started) after --timeout seconds. With
+--ocr each child OCRs single-process, so --workers bounds the total number
+of OCR processes too. Results are written per file under
+<output_dir>/<handout>/ and appended to <output_dir>/batch_results.jsonl as
+they finish; files whose outputs are newer than the source PDF are skipped.
+"""
+import sys
+import os
+import json
+import time
+import signal
+import asyncio
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# op name -> (script, output file)
+OPERATIONS = {
+    "clean": ("process_pdf.py", "clean.json"),
+    "text": ("process_pdf.py", "text.json"),
+    "lectures": ("parse_pdf.py", "lectures.json"),
+    "info": ("pdf_utils.py", "info.json"),
+}
+OCR_OPERATIONS = ("clean", "text", "lectures")
+
+DEFAULT_OPS = "clean,text,lectures"
+DEFAULT_TIMEOUT = 600
+
+def collect_pdfs(source):
+    """Return PDF paths from a directory (recursive) or a manifest file"""
+    if os.path.isdir(source):
+        pdfs = []
+        for root, _, files in os.walk(source):
+            for name in files:
+                if name.lower().endswith(".pdf"):
+                    pdfs.append(os.path.join(root, name))
+        return sorted(pdfs), source
+
+    # Manifest: JSON list of paths / {"path": ...} objects, or one path per line
+    base = os.path.dirname(os.path.abspath(source))
+    with open(source, "r", encoding="utf-8") as f:
+        content = f.read()
+    if source.lower().endswith(".json"):
+        entries = [e["path"] if isinstance(e, dict) else e for e in json.loads(content)]
+    else:
+        entries = [line.strip() for line in content.splitlines()
+                   if line.strip() and not line.strip().startswith("#")]
+    return [os.path.join(base, e) for e in entries], base
+
+def output_dir_for(pdf_path, base, output_root):
+    rel = os.path.relpath(os.path.abspath(pdf_path), os.path.abspath(base))
+    if rel.startswith(".."):
+        rel = os.path.basename(pdf_path)
+    return os.path.join(output_root, os.path.splitext(rel)[0])
+
+def is_up_to_date(pdf_path, output_path):
+    return (os.path.exists(output_path) and
+            os.path.getmtime(output_path) >= os.path.getmtime(pdf_path))
+
+def build_command(op, pdf_path, out_dir, enable_ocr):
+    script = os.path.join(SCRIPT_DIR, OPERATIONS[op][0])
+    if op == "clean":
+        args = [pdf_path, os.path.join(out_dir, "cleaned.pdf")]
+    elif op == "text":
+        args = [pdf_path, os.path.join(out_dir, "cleaned.pdf"), "--extract-text"]
+    elif op == "lectures":
+        args = [pdf_path]
+    else:
+        args = ["info", pdf_path]
+    if enable_ocr and op in OCR_OPERATIONS:
+        # The batch pool is the parallelism; a per-child OCR pool would
+        # multiply it by cpu_count
+        args += ["--ocr", "--ocr-workers", "1"]
+    return [sys.executable, script] + args
+
+def kill_process_group(proc):
+    """Kill the child and anything it spawned (it leads its own session)"""
+    if hasattr(os, "killpg"):
+        try:
+            os.killpg(proc.pid, signal.SIGKILL)
+            return
+        except ProcessLookupError:
+            return
+    proc.kill()
+
+def write_json(path, data):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2)
+    os.replace(tmp_path, path)
+
+async def run_operation(semaphore, op, pdf_path, out_dir, timeout, enable_ocr):
+    """Run one script on one PDF; returns a result record (never raises)"""
+    record = {"file": pdf_path, "op": op}
+    try:
+        async with semaphore:
+            started = time.perf_counter()
+            proc = await asyncio.create_subprocess_exec(
+                *build_command(op, pdf_path, out_dir, enable_ocr),
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.DEVNULL,
+                start_new_session=True
+            )
+            try:
+                stdout, _ = await asyncio.wait_for(proc.communicate(), timeout)
+            except asyncio.TimeoutError:
+                record.update(status="timeout", seconds=round(time.perf_counter() - started, 3))
+                return record
+            finally:
+                # Timeout, Ctrl-C or cancellation: the child is in its own
+                # session, so nothing else will stop it or its OCR workers
+                if proc.returncode is None:
+                    kill_process_group(proc)
+                    await proc.wait()
+            record["seconds"] = round(time.perf_counter() - started, 3)
+
+        try:
+            result = json.loads(stdout.decode("utf-8"))
+        except ValueError:
+            result = {"error": stdout.decode("utf-8", "replace").strip() or f"exit code {proc.returncode}"}
+
+        if proc.returncode != 0 or (isinstance(result, dict) and "error" in result):
+            record.update(status="failed", error=result.get("error") if isinstance(result, dict) else None)
+            return record
+
+        # Only successful results are written, so failures are retried next run
+        write_json(os.path.join(out_dir, OPERATIONS[op][1]), result)
+        record["status"] = "ok"
+        if op in ("text", "info"):
+            record["pages"] = result.get("pages", 0)
+        elif op == "lectures":
+            record["lectures"] = len(result)
+        return record
+    except Exception as e:
+        # One bad file (spawn failure, unwritable output, ...) must not abort the batch
+        record.update(status="failed", error=str(e))
+        return record
+
+def update_summary(summary, output_root, started, operations):
+    """Refresh the throughput figures and rewrite batch_summary.json"""
+    elapsed = time.perf_counter() - started
+    summary["operations"] = operations
+    summary["completed"] = summary["ok"] + summary["failed"] + summary["timeout"]
+    summary["seconds"] = round(elapsed, 3)
+    summary["ops_per_second"] = round(summary["completed"] / elapsed, 3) if elapsed > 0 else 0
+    summary["mb_per_second"] = round(summary["bytes"] / 1e6 / elapsed, 3) if elapsed > 0 else 0
+    write_json(os.path.join(output_root, "batch_summary.json"), summary)
+
+async def run_batch(source, output_root, ops, workers, timeout, enable_ocr=False, force=False):
+    pdfs, base = collect_pdfs(source)
+    os.makedirs(output_root, exist_ok=True)
+    semaphore = asyncio.Semaphore(workers)
+    log_path = os.path.join(output_root, "batch_results.jsonl")
+
+    # bytes only counts files with at least one op scheduled, so skipped
+    # (up to date) handouts do not inflate mb_per_second
+    summary = {"files": len(pdfs), "ok": 0, "failed": 0, "timeout": 0, "skipped": 0, "pages": 0, "bytes": 0}
+    tasks = []
+    for pdf_path in pdfs:
+        if not os.path.exists(pdf_path):
+            tasks.append(asyncio.sleep(0, {"file": pdf_path, "op": None, "status": "failed", "error": "PDF file not found"}))
+            continue
+        out_dir = output_dir_for(pdf_path, base, output_root)
+        os.makedirs(out_dir, exist_ok=True)
+        scheduled = False
+        for op in ops:
+            if not force and is_up_to_date(pdf_path, os.path.join(out_dir, OPERATIONS[op][1])):
+                summary["skipped"] += 1
+                continue
+            tasks.append(run_operation(semaphore, op, pdf_path, out_dir, timeout, enable_ocr))
+            scheduled = True
+        if scheduled:
+            summary["bytes"] += os.path.getsize(pdf_path)
+
+    started = time.perf_counter()
+    try:
+        with open(log_path, "a", encoding="utf-8") as log:
+            for done in asyncio.as_completed(tasks):
+                record = await done
+                summary[record["status"]] += 1
+                summary["pages"] += record.get("pages", 0)
+                log.write(json.dumps(record) + "\n")
+                log.flush()
+                update_summary(summary, output_root, started, len(tasks))
+                print(f"PROGRESS:{summary['completed']}/{len(tasks)}", file=sys.stderr)
+                sys.stderr.flush()
+    finally:
+        # Also written when interrupted, so the partial run is accounted for
+        update_summary(summary, output_root, started, len(tasks))
+    return summary
+
+if __name__ == "__main__":
+    if len(sys.argv) < 3:
+        print(json.dumps({"error": "Usage: python batch_process.py <dir|manifest> <output_dir> [--ops clean,text,lectures,info] [--workers N] [--timeout SECONDS] [--ocr] [--force]"}))
+        sys.exit(1)
+
+    source, output_root = sys.argv[1], sys.argv[2]
+    ops = (sys.argv[sys.argv.index("--ops") + 1] if "--ops" in sys.argv else DEFAULT_OPS).split(",")
+    workers = int(sys.argv[sys.argv.index("--workers") + 1]) if "--workers" in sys.argv else os.cpu_count() or 1
+    timeout = float(sys.argv[sys.argv.index("--timeout") + 1]) if "--timeout" in sys.argv else DEFAULT_TIMEOUT
+
+    unknown = [op for op in ops if op not in OPERATIONS]
+    if unknown:
+        print(json.dumps({"error": f"Unknown operation(s): {', '.join(unknown)}"}))
+        sys.exit(1)
+    if not os.path.exists(source):
+        print(json.dumps({"error": f"Source not found: {source}"}))
+        sys.exit(1)
+
+    try:
+        summary = asyncio.run(run_batch(source, output_root, ops, workers, timeout,
+                                        "--ocr" in sys.argv, "--force" in sys.argv))
+        print(json.dumps({"success": True, "summary": summary}))
+    except Exception as e:
+        print(json.dumps({"success": False, "error": str(e)}))
+        sys.exit(1)
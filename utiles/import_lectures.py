@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+Load a bulk lecture payload (from `parse_pdf.py --bulk`) into the lectures table.
+
+Usage:
+    python import_lectures.py payload.ndjson|payload.csv|- [--chunk-size N] [--sqlite db_path]
+
+Without --sqlite it connects to MySQL/TiDB with the same DB_HOST, DB_USER,
+DB_PASS and DB_NAME environment variables as config/db.js (needs pymysql),
+verifying the server certificate like db.js does (rejectUnauthorized). Set
+DB_SSL_CA to a CA bundle path to trust something other than the system store.
+Titles are de-duplicated per course (case-insensitive) against the
+database and the payload itself; rows go in as multi-row parameterized
+INSERTs, one transaction per chunk.
+"""
+import sys
+import os
+import csv
+import ssl
+import json
+
+DEFAULT_CHUNK_SIZE = 500
+
+SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS lectures (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    course_id INTEGER NOT NULL,
+    title TEXT NOT NULL,
+    total_questions INTEGER DEFAULT 0,
+    start_page INTEGER,
+    end_page INTEGER
+)
+"""
+
+def connect(sqlite_path=None):
+    """Return (connection, placeholder) for SQLite or MySQL"""
+    if sqlite_path:
+        import sqlite3
+        conn = sqlite3.connect(sqlite_path)
+        conn.execute(SQLITE_SCHEMA)
+        return conn, "?"
+
+    import pymysql
+    conn = pymysql.connect(
+        host=os.environ.get("DB_HOST"),
+        user=os.environ.get("DB_USER"),
+        password=os.environ.get("DB_PASS"),
+        database=os.environ.get("DB_NAME"),
+        # Verified TLS: certificate chain and hostname, same as db.js
+        ssl=ssl.create_default_context(cafile=os.environ.get("DB_SSL_CA")),
+        autocommit=False
+    )
+    return conn, "%s"
+
+def read_payload(stream, fmt):
+    """Yield lecture records from an NDJSON or CSV stream"""
+    if fmt == "csv":
+        for row in csv.DictReader(stream):
+            yield row
+    else:
+        for line in stream:
+            line = line.strip()
+            if line:
+                yield json.loads(line)
+
+def normalize_record(record):
+    """Return (course_id, title, start_page, end_page) or None if invalid"""
+    try:
+        title = str(record["title"]).strip()
+        row = (int(record["course_id"]), title, int(record["start_page"]), int(record["end_page"]))
+    except (KeyError, TypeError, ValueError):
+        return None
+    return row if title else None
+
+class LectureImporter:
+    """Buffers payload rows and flushes them to the database chunk by chunk"""
+
+    def __init__(self, conn, placeholder, chunk_size=DEFAULT_CHUNK_SIZE):
+        self.conn = conn
+        self.placeholder = placeholder
+        self.chunk_size = chunk_size
+        self.known_titles = {}  # course_id -> set of lowercased titles
+        self.buffer = []
+        self.inserted = 0
+        self.skipped = 0
+        self.invalid = 0
+
+    def add(self, record):
+        row = normalize_record(record)
+        if row is None:
+            self.invalid += 1
+            return
+        self.buffer.append(row)
+        if len(self.buffer) >= self.chunk_size:
+            self.flush()
+
+    def _load_existing_titles(self, cursor, course_ids):
+        """Fetch existing titles for courses not seen yet, in one query"""
+        missing = [cid for cid in course_ids if cid not in self.known_titles]
+        if not missing:
+            return
+        for cid in missing:
+            self.known_titles[cid] = set()
+        marks = ", ".join([self.placeholder] * len(missing))
+        cursor.execute(f"SELECT course_id, title FROM lectures WHERE course_id IN ({marks})", missing)
+        for course_id, title in cursor.fetchall():
+            self.known_titles[course_id].add(title.strip().lower())
+
+    def flush(self):
+        if not self.buffer:
+            return
+        rows, self.buffer = self.buffer, []
+        cursor = self.conn.cursor()
+        try:
+            self._load_existing_titles(cursor, {row[0] for row in rows})
+
+            values = []
+            for course_id, title, start_page, end_page in rows:
+                key = title.lower()
+                titles = self.known_titles[course_id]
+                if key in titles:
+                    self.skipped += 1
+                    continue
+                titles.add(key)
+                values.extend((course_id, title, 0, start_page, end_page))
+
+            if values:
+                row_marks = "(" + ", ".join([self.placeholder] * 5) + ")"
+                count = len(values) // 5
+                cursor.execute(
+                    "INSERT INTO lectures (course_id, title, total_questions, start_page, end_page) "
+                    f"VALUES {', '.join([row_marks] * count)}",
+                    values
+                )
+                self.inserted += count
+            self.conn.commit()
+        except Exception:
+            self.conn.rollback()
+            # Forget titles from the failed chunk so a retry sees the database state
+            for course_id, _, _, _ in rows:
+                self.known_titles.pop(course_id, None)
+            raise
+        finally:
+            cursor.close()
+
+def import_lectures(stream, conn, placeholder, fmt="ndjson", chunk_size=DEFAULT_CHUNK_SIZE):
+    importer = LectureImporter(conn, placeholder, chunk_size)
+    for record in read_payload(stream, fmt):
+        importer.add(record)
+    importer.flush()
+    return {"inserted": importer.inserted, "skipped": importer.skipped, "invalid": importer.invalid}
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print(json.dumps({"error": "Usage: python import_lectures.py payload.ndjson|payload.csv|- [--chunk-size N] [--sqlite db_path]"}))
+        sys.exit(1)
+
+    source = sys.argv[1]
+    chunk_size = int(sys.argv[sys.argv.index("--chunk-size") + 1]) if "--chunk-size" in sys.argv else DEFAULT_CHUNK_SIZE
+    sqlite_path = sys.argv[sys.argv.index("--sqlite") + 1] if "--sqlite" in sys.argv else None
+    fmt = "csv" if source.lower().endswith(".csv") or "--csv" in sys.argv else "ndjson"
+
+    try:
+        conn, placeholder = connect(sqlite_path)
+        try:
+            if source == "-":
+                stats = import_lectures(sys.stdin, conn, placeholder, fmt, chunk_size)
+            else:
+                with open(source, "r", encoding="utf-8", newline="") as f:
+                    stats = import_lectures(f, conn, placeholder, fmt, chunk_size)
+        finally:
+            conn.close()
+        print(json.dumps({"success": True, **stats}))
+    except Exception as e:
+        print(json.dumps({"success": False, "error": str(e)}))
+        sys.exit(1)
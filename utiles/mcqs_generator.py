@@ -1,7 +1,12 @@
 import PyPDF2
+import os
 import re
+import json
+import math
+import time
 import random
-from collections import defaultdict
+import hashlib
+from collections import defaultdict, Counter
 import nltk
 from nltk.tokenize import sent_tokenize
 from transformers import pipeline
@@ -9,21 +14,227 @@ from transformers import pipeline
 # Download required NLTK data
 nltk.download('punkt')
 
+STOPWORDS = {
+    "the", "and", "for", "are", "but", "not", "you", "all", "any", "can", "had", "her", "was",
+    "one", "our", "out", "has", "his", "how", "its", "may", "who", "did", "get", "use", "this",
+    "that", "with", "have", "from", "they", "will", "would", "there", "their", "what", "about",
+    "which", "when", "were", "been", "into", "than", "then", "them", "these", "those", "such",
+    "also", "some", "each", "other", "more", "most", "only", "very", "should", "could"
+}
+
+MERSENNE_PRIME = (1 << 61) - 1
+
+class SentenceSelector:
+    """
+    Cheap pre-filter in front of the question model: drops short or
+    boilerplate sentences, collapses near-duplicates (MinHash over character
+    shingles) and keeps the most informative sentences by TF-IDF.
+    """
+    def __init__(self, min_chars=30, min_words=6, min_terms=3, shingle_size=5, num_hashes=64, similarity=0.7):
+        self.min_chars = min_chars
+        self.min_words = min_words
+        self.min_terms = min_terms
+        self.shingle_size = shingle_size
+        self.num_hashes = num_hashes
+        self.similarity = similarity
+        # Universal hash family (a * h + b) mod p standing in for permutations
+        rng = random.Random(42)
+        self.hash_params = [(rng.randrange(1, MERSENNE_PRIME), rng.randrange(MERSENNE_PRIME))
+                            for _ in range(num_hashes)]
+        # Signatures of sentences already selected, shared across topics
+        self.seen_signatures = []
+        self.stats = Counter()
+
+    def tokenize(self, sentence):
+        return [w for w in re.findall(r"[a-z]{3,}", sentence.lower()) if w not in STOPWORDS]
+
+    def is_boilerplate(self, sentence):
+        """Too short, or mostly digits/punctuation (page numbers, tables, headers)"""
+        if len(sentence) <= self.min_chars or len(sentence.split()) < self.min_words:
+            return True
+        letters = sum(c.isalpha() for c in sentence)
+        return letters / len(sentence) < 0.6
+
+    def signature(self, sentence):
+        """MinHash signature over character shingles"""
+        text = " ".join(re.findall(r"\w+", sentence.lower()))
+        shingles = {text[i:i + self.shingle_size]
+                    for i in range(max(1, len(text) - self.shingle_size + 1))}
+        hashes = [int.from_bytes(hashlib.blake2b(sh.encode(), digest_size=8).digest(), "big") for sh in shingles]
+        return [min((a * h + b) % MERSENNE_PRIME for h in hashes) for a, b in self.hash_params]
+
+    def is_duplicate(self, signature, signatures):
+        for other in signatures:
+            matches = sum(a == b for a, b in zip(signature, other))
+            if matches / self.num_hashes >= self.similarity:
+                return True
+        return False
+
+    def tfidf_scores(self, token_lists):
+        """Mean TF-IDF weight of each sentence's terms, IDF taken over the topic"""
+        doc_freq = Counter()
+        for tokens in token_lists:
+            doc_freq.update(set(tokens))
+        n = len(token_lists)
+        idf = {term: math.log((1 + n) / (1 + df)) + 1 for term, df in doc_freq.items()}
+
+        scores = []
+        for tokens in token_lists:
+            if not tokens:
+                scores.append(0.0)
+                continue
+            tf = Counter(tokens)
+            scores.append(sum(count * idf[term] for term, count in tf.items()) / len(tokens))
+        return scores
+
+    def select(self, sentences, k):
+        """Return up to k distinct, informative sentences (best first)"""
+        self.stats["candidates"] += len(sentences)
+        candidates, token_lists = [], []
+        for sentence in sentences:
+            tokens = self.tokenize(sentence)
+            if self.is_boilerplate(sentence) or len(set(tokens)) < self.min_terms:
+                continue
+            candidates.append(sentence)
+            token_lists.append(tokens)
+        self.stats["short_or_boilerplate"] += len(sentences) - len(candidates)
+        if not candidates:
+            return []
+
+        scores = self.tfidf_scores(token_lists)
+        ranked = sorted(zip(scores, candidates), key=lambda pair: pair[0], reverse=True)
+
+        selected = []
+        for score, sentence in ranked:
+            if len(selected) >= k:
+                break
+            sig = self.signature(sentence)
+            if self.is_duplicate(sig, self.seen_signatures):
+                self.stats["near_duplicates"] += 1
+                continue
+            self.seen_signatures.append(sig)
+            selected.append(sentence)
+        return selected
+
+def sentence_hash(sentence):
+    """Stable id for a source sentence, insensitive to case and spacing"""
+    return hashlib.sha1(" ".join(sentence.lower().split()).encode("utf-8")).hexdigest()[:16]
+
+def file_hash(path):
+    """Content hash of a file, used to tell handouts apart in shared output"""
+    h = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+class MCQWriter:
+    """
+    Appends each MCQ to a JSONL file as soon as it is generated, so an
+    interrupted run keeps its work. Each record names its source PDF (path
+    and content hash); MCQs already in the file for the same source are
+    loaded up front and can be reused instead of calling the model again.
+    If parquet_file is given, the JSONL is converted to Parquet on close
+    (needs pyarrow); Parquet files cannot be appended to safely mid-run.
+    """
+    def __init__(self, jsonl_file, source_pdf, parquet_file=None):
+        self.jsonl_file = jsonl_file
+        self.parquet_file = parquet_file
+        self.source = os.path.abspath(source_pdf)
+        self.source_hash = file_hash(source_pdf)
+        self.records = {}  # sentence hash -> record from an earlier run on this PDF
+
+        last_line = ""
+        if os.path.exists(jsonl_file):
+            with open(jsonl_file, 'r', encoding='utf-8') as f:
+                for last_line in f:
+                    record = self.parse_record(last_line)
+                    if record is None:
+                        continue  # torn last line from a crash, or not one of ours
+                    # The file may be shared by runs on other handouts
+                    if record.get('source_hash') == self.source_hash:
+                        self.records[record['sentence_hash']] = record
+
+        self.file = open(jsonl_file, 'a', encoding='utf-8')
+        if last_line and not last_line.endswith("\n"):
+            self.file.write("\n")
+
+    @staticmethod
+    def parse_record(line):
+        """Decode one JSONL line; None unless it is an MCQ record"""
+        try:
+            record = json.loads(line)
+        except ValueError:
+            return None
+        if not isinstance(record, dict) or not isinstance(record.get('sentence_hash'), str):
+            return None
+        return record
+
+    def get(self, sentence):
+        return self.records.get(sentence_hash(sentence))
+
+    def write(self, topic, sentence, mcq, source_page=None):
+        record = {
+            'source': self.source,
+            'source_hash': self.source_hash,
+            'topic': topic,
+            'source_page': source_page,
+            'sentence_hash': sentence_hash(sentence),
+            'sentence': sentence,
+            'question': mcq['question'],
+            'options': mcq['options'],
+            'correct_answer': mcq['correct_answer'],
+            'generated_at': time.time()
+        }
+        self.file.write(json.dumps(record) + "\n")
+        self.file.flush()
+        self.records[record['sentence_hash']] = record
+        return record
+
+    def close(self):
+        self.file.close()
+        if self.parquet_file:
+            self.write_parquet()
+
+    def write_parquet(self):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            print("pyarrow is not installed, skipping Parquet output")
+            return
+        with open(self.jsonl_file, 'r', encoding='utf-8') as f:
+            rows = [record for record in map(self.parse_record, f) if record is not None]
+        pq.write_table(pa.Table.from_pylist(rows), self.parquet_file)
+
 class MCQGenerator:
     def __init__(self):
         self.question_generator = pipeline("text2text-generation", model="mrm8488/t5-base-finetuned-question-generation-ap")
+        self.selector = SentenceSelector()
         
-    def extract_text_from_pdf(self, pdf_path):
-        """Extract text from PDF file"""
-        text = ""
+    def extract_pages_from_pdf(self, pdf_path):
+        """Extract the text of each PDF page"""
+        pages = []
         try:
             with open(pdf_path, 'rb') as file:
                 pdf_reader = PyPDF2.PdfReader(file)
                 for page in pdf_reader.pages:
-                    text += page.extract_text() + "\n"
+                    pages.append(page.extract_text())
         except Exception as e:
             print(f"Error reading PDF: {e}")
-        return text
+        return pages
+    
+    def extract_text_from_pdf(self, pdf_path):
+        """Extract text from PDF file"""
+        return "".join(page + "\n" for page in self.extract_pages_from_pdf(pdf_path))
+    
+    def find_source_page(self, sentence, page_texts):
+        """1-based page whose (preprocessed) text contains the sentence, if any"""
+        head, tail = sentence[:60], sentence[-60:]
+        for page_num, page_text in enumerate(page_texts, 1):
+            if head in page_text or tail in page_text:
+                return page_num
+        return None
     
     def preprocess_text(self, text):
         """Clean and preprocess extracted text"""
@@ -55,6 +266,7 @@ class MCQGenerator:
     
     def generate_mcqs_from_sentence(self, sentence, num_options=4):
         """Generate MCQs from a single sentence"""
+        self.selector.stats["model_calls"] += 1
         try:
             # Use the question generation model
             result = self.question_generator(sentence, max_length=100, num_return_sequences=1)
@@ -79,8 +291,8 @@ class MCQGenerator:
         
         return None
     
-    def create_mcqs_from_topics(self, topics, mcqs_per_topic=10):
-        """Create MCQs for each identified topic"""
+    def create_mcqs_from_topics(self, topics, mcqs_per_topic=10, writer=None, page_texts=None):
+        """Create MCQs for each identified topic, appending each one to writer if given"""
         all_mcqs = {}
         
         for topic, content in topics.items():
@@ -93,15 +305,26 @@ class MCQGenerator:
             # Split into sentences
             sentences = sent_tokenize(combined_content)
             
-            # Select random sentences to generate questions from
-            selected_sentences = random.sample(
-                [s for s in sentences if len(s) > 30], 
-                min(mcqs_per_topic, len(sentences))
-            )
+            # What random sampling of long sentences would have sent to the model
+            long_sentences = [s for s in sentences if len(s) > 30]
+            self.selector.stats["baseline_calls"] += min(mcqs_per_topic, len(long_sentences))
+            
+            # Keep only the top distinct, informative sentences
+            selected_sentences = self.selector.select(sentences, mcqs_per_topic)
             
             for sentence in selected_sentences:
+                # Resuming: reuse the MCQ an earlier run already wrote
+                previous = writer.get(sentence) if writer else None
+                if previous:
+                    self.selector.stats["resumed"] += 1
+                    topic_mcqs.append(previous)
+                    continue
+                
                 mcq = self.generate_mcqs_from_sentence(sentence)
                 if mcq:
+                    if writer:
+                        source_page = self.find_source_page(sentence, page_texts or [])
+                        writer.write(topic, sentence, mcq, source_page)
                     topic_mcqs.append(mcq)
             
             if topic_mcqs:
@@ -128,31 +351,56 @@ class MCQGenerator:
                     f.write(f"\nCorrect Answer: Option {mcq['correct_answer'] + 1}\n")
                     f.write("-" * 40 + "\n\n")
     
-    def generate_from_pdf(self, pdf_path, output_file, mcqs_per_topic=10):
-        """Main function to generate MCQs from PDF"""
+    def generate_from_pdf(self, pdf_path, output_file, mcqs_per_topic=10, jsonl_file=None, parquet_file=None):
+        """
+        Main function to generate MCQs from PDF. Each MCQ is appended to
+        jsonl_file (default: output_file with a .jsonl extension) as it is
+        generated; re-running on the same PDF after an interruption skips
+        sentences already there. Records from other handouts in a shared
+        file are left alone and never reused.
+        """
+        self.selector = SentenceSelector()
+        
         print("Extracting text from PDF...")
-        text = self.extract_text_from_pdf(pdf_path)
+        pages = self.extract_pages_from_pdf(pdf_path)
+        text = "".join(page + "\n" for page in pages)
         
-        if not text:
+        if not text.strip():
             print("No text extracted from PDF")
             return
         
         print("Preprocessing text...")
         cleaned_text = self.preprocess_text(text)
+        page_texts = [self.preprocess_text(page) for page in pages]
         
         print("Identifying topics...")
         topics = self.identify_topics(cleaned_text)
         
         print(f"Found {len(topics)} topics")
         
+        jsonl_file = jsonl_file or os.path.splitext(output_file)[0] + ".jsonl"
+        writer = MCQWriter(jsonl_file, pdf_path, parquet_file)
+        if writer.records:
+            print(f"Resuming: {len(writer.records)} MCQs already in {jsonl_file}")
+        
         print("Generating MCQs...")
-        all_mcqs = self.create_mcqs_from_topics(topics, mcqs_per_topic)
+        try:
+            all_mcqs = self.create_mcqs_from_topics(topics, mcqs_per_topic, writer, page_texts)
+        finally:
+            writer.close()
         
         print("Saving MCQs to file...")
         self.save_mcqs_to_file(all_mcqs, output_file)
         
         total_mcqs = sum(len(mcqs) for mcqs in all_mcqs.values())
         print(f"Generated {total_mcqs} MCQs saved to {output_file}")
+        
+        stats = self.selector.stats
+        print(f"Model calls: {stats['model_calls']} "
+              f"(saved {stats['baseline_calls'] - stats['model_calls']} of {stats['baseline_calls']}; "
+              f"{stats['resumed']} reused from {jsonl_file}, "
+              f"{stats['near_duplicates']} near-duplicates, "
+              f"{stats['short_or_boilerplate']} short/boilerplate sentences skipped)")
 
 # Alternative simpler approach for template-based generation
 class TemplateMCQGenerator:
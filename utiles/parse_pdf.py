@@ -1,4 +1,6 @@
 import sys
+import os
+import csv
 import json
 import re
 import pdfplumber
@@ -11,14 +13,26 @@ SECTION_PATTERNS = {
     "Topic": r"(Topic\s*\d+[:.-]?)"
 }
 
-def parse_pdf(file_path):
+def ocr_page_texts(file_path, dpi=None, workers=None):
+    """OCR pages without a text layer; returns {page_num (1-based): text}"""
+    # Imported lazily so plain parsing does not need fitz/pytesseract
+    from process_pdf import OCR_DPI, ocr_document, group_ocr_lines
+
+    ocr_results = ocr_document(file_path, dpi or OCR_DPI, workers)
+    return {
+        page_num + 1: "\n".join(txt for txt, _, _ in group_ocr_lines(words))
+        for page_num, words in ocr_results.items()
+    }
+
+def parse_pdf(file_path, enable_ocr=False, ocr_dpi=None, ocr_workers=None):
     results = {}
+    ocr_texts = ocr_page_texts(file_path, ocr_dpi, ocr_workers) if enable_ocr else {}
     with pdfplumber.open(file_path) as pdf:
         total_pages = len(pdf.pages)
         section_positions = []
 
         for page_num, page in enumerate(pdf.pages, start=1):
-            text = page.extract_text() or ""
+            text = ocr_texts.get(page_num) or page.extract_text() or ""
             print(f"PROGRESS:{int((page_num / total_pages) * 100)}", file=sys.stderr)
             sys.stderr.flush()
 
@@ -50,14 +64,96 @@ def parse_pdf(file_path):
 
     return results
 
+BULK_FIELDS = ["course_id", "title", "start_page", "end_page", "source"]
+
+def read_bulk_manifest(manifest_path):
+    """
+    Read handout -> course assignments, either a JSON list of
+    {"course_id": .., "path": ..} objects or CSV lines "course_id,path".
+    Relative paths are resolved against the manifest's directory. Invalid
+    rows (including a CSV header) are reported on stderr and skipped.
+    """
+    base = os.path.dirname(os.path.abspath(manifest_path))
+    with open(manifest_path, "r", encoding="utf-8", newline="") as f:
+        if manifest_path.lower().endswith(".json"):
+            rows = [(e.get("course_id"), e.get("path")) if isinstance(e, dict) else (None, e)
+                    for e in json.load(f)]
+        else:
+            rows = list(csv.reader(f))
+
+    entries = []
+    for row_num, row in enumerate(rows, start=1):
+        if not row or str(row[0]).lstrip().startswith("#"):
+            continue
+        try:
+            course_id, path = row[0], row[1]
+            if course_id is None or not path or not str(path).strip():
+                raise ValueError("missing course_id or path")
+            course_id = int(str(course_id).strip())
+            path = str(path).strip()
+        except (IndexError, TypeError, ValueError) as e:
+            print(json.dumps({"error": f"Invalid manifest row {row_num}: {e}", "row": row}), file=sys.stderr)
+            continue
+        entries.append((course_id, os.path.join(base, path)))
+    return entries
+
+def parse_bulk(manifest_path, out, fmt="ndjson", enable_ocr=False, ocr_dpi=None, ocr_workers=None):
+    """
+    Parse every handout in the manifest and stream one lecture record per
+    line to `out` as each handout finishes. Handouts that fail are reported
+    on stderr and skipped. Returns (handouts parsed, records written).
+    """
+    writer = None
+    if fmt == "csv":
+        writer = csv.DictWriter(out, fieldnames=BULK_FIELDS)
+        writer.writeheader()
+
+    handouts = records = 0
+    for course_id, path in read_bulk_manifest(manifest_path):
+        try:
+            sections = parse_pdf(path, enable_ocr, ocr_dpi, ocr_workers)
+        except Exception as e:
+            print(json.dumps({"error": str(e), "source": path}), file=sys.stderr)
+            continue
+
+        for title, pages in sections.items():
+            row = {"course_id": course_id, "title": title, "start_page": pages["start_page"],
+                   "end_page": pages["end_page"], "source": os.path.basename(path)}
+            if writer:
+                writer.writerow(row)
+            else:
+                out.write(json.dumps(row) + "\n")
+            records += 1
+        out.flush()
+        handouts += 1
+    return handouts, records
+
 if __name__ == "__main__":
     if len(sys.argv) < 2:
         print(json.dumps({"error": "No PDF file provided"}))
         sys.exit(1)
 
     file_path = sys.argv[1]
+    enable_ocr = "--ocr" in sys.argv
+    ocr_dpi = int(sys.argv[sys.argv.index("--ocr-dpi") + 1]) if "--ocr-dpi" in sys.argv else None
+    ocr_workers = int(sys.argv[sys.argv.index("--ocr-workers") + 1]) if "--ocr-workers" in sys.argv else None
+
+    # Bulk mode: python parse_pdf.py --bulk manifest [--format ndjson|csv]
+    if file_path == "--bulk":
+        if len(sys.argv) < 3:
+            print(json.dumps({"error": "No manifest file provided"}))
+            sys.exit(1)
+        fmt = sys.argv[sys.argv.index("--format") + 1] if "--format" in sys.argv else "ndjson"
+        try:
+            handouts, records = parse_bulk(sys.argv[2], sys.stdout, fmt, enable_ocr, ocr_dpi, ocr_workers)
+            print(json.dumps({"handouts": handouts, "records": records}), file=sys.stderr)
+        except Exception as e:
+            print(json.dumps({"error": str(e)}), file=sys.stderr)
+            sys.exit(1)
+        sys.exit(0)
+
     try:
-        output = parse_pdf(file_path)
+        output = parse_pdf(file_path, enable_ocr, ocr_dpi, ocr_workers)
         print(json.dumps(output, indent=2))
     except Exception as e:
         print(json.dumps({"error": str(e)}))
@@ -1,9 +1,16 @@
 #!/usr/bin/env python3
-import sys, re, hashlib, json
+import sys, os, re, io, hashlib, json, tempfile
+from array import array
+from concurrent.futures import ProcessPoolExecutor
 import fitz  # PyMuPDF
 from PIL import Image
 import pytesseract
 
+try:
+    import numpy as np  # optional: vectorises the layout rules
+except ImportError:
+    np = None
+
 # Configure tesseract path if needed (uncomment and adjust for your system)
 # pytesseract.pytesseract.tesseract_cmd = r"C:\Program Files\Tesseract-OCR\tesseract.exe"
 
@@ -32,6 +39,18 @@ TEXT_PATTERNS = [
     r"click here"
 ]
 
+# OCR settings for scanned pages (pages without a text layer)
+OCR_DPI = 300
+OCR_LANG = "eng"
+OCR_MIN_CONFIDENCE = 40
+# Per-user cache (never a shared /tmp dir other users could plant entries in)
+OCR_CACHE_DIR = os.environ.get("QUIZZ_OCR_CACHE_DIR") or os.path.join(
+    os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache"),
+    "quizz-app", "ocr"
+)
+OCR_CACHE_MAX_ENTRIES = 20000  # least recently used pages are evicted beyond this
+OCR_CACHE_VERSION = 2  # bump when the cached word record changes
+
 # Watermark detection keywords
 WATERMARK_WORDS = [
     "cluesbook", "hamza", "anwar", "team", "institute", 
@@ -39,79 +58,315 @@ WATERMARK_WORDS = [
     "vuhelp", "virtual university", "vu students"
 ]
 
+# Very common spam phrases
+SPAM_PHRASES = [
+    "join our", "visit us", "click here", "download now",
+    "subscribe to", "follow our", "like our", "share this"
+]
+
+# All content rules folded into one regex, compiled once
+REMOVAL_REGEX = re.compile(
+    "|".join([f"(?:{pat})" for pat in TEXT_PATTERNS] +
+             [re.escape(word) for word in WATERMARK_WORDS + SPAM_PHRASES]),
+    re.IGNORECASE
+)
+
+# Large font in a very small text area (likely headers/footers)
+LARGE_FONT_SIZE = 18
+MAX_LARGE_FONT_AREA_RATIO = 0.005
+
+def is_removable_text(txt):
+    """Content rules only: patterns, watermark keywords and spam phrases"""
+    txt_lower = txt.lower().strip()
+    return len(txt_lower) >= 2 and REMOVAL_REGEX.search(txt_lower) is not None
+
 def should_remove_text(txt, font_size=None, flags=0, bbox_area=0, page_area=1):
     """
     Determine if text should be removed based on content and context
     """
-    txt_lower = txt.lower().strip()
-    
-    if not txt_lower or len(txt_lower) < 2:
+    if len(txt.strip()) < 2:
         return False
     
-    # Check against patterns
-    for pat in TEXT_PATTERNS:
-        if re.search(pat, txt_lower, re.IGNORECASE):
-            return True
-    
-    # Check for watermark keywords
-    for word in WATERMARK_WORDS:
-        if word in txt_lower:
-            return True
-    
-    # Remove very common spam phrases
-    spam_phrases = [
-        "join our", "visit us", "click here", "download now",
-        "subscribe to", "follow our", "like our", "share this"
-    ]
-    for phrase in spam_phrases:
-        if phrase in txt_lower:
-            return True
+    if is_removable_text(txt):
+        return True
     
     # Large font text at page edges (likely headers/footers)
-    if font_size and font_size > 18:
+    if font_size and font_size > LARGE_FONT_SIZE:
         bbox_ratio = bbox_area / page_area if page_area > 0 else 0
-        if bbox_ratio < 0.005:  # Very small text area with large font
+        if bbox_ratio < MAX_LARGE_FONT_AREA_RATIO:
             return True
     
     return False
 
-def extract_clean_text(pdf_path):
+class PageLayout:
+    """
+    Text spans of one page stored as parallel columns, keeping only what
+    the removal rules need (no fonts, colors, origins or image data)
+    """
+    __slots__ = ("page_area", "text", "line", "x0", "y0", "x1", "y1", "size", "flags")
+
+    def __init__(self, page):
+        self.page_area = page.rect.width * page.rect.height
+        self.text = []
+        self.line = array("i")
+        self.x0, self.y0, self.x1, self.y1 = array("d"), array("d"), array("d"), array("d")
+        self.size = array("d")
+        self.flags = array("i")
+
+        # TEXTFLAGS_TEXT skips image blocks, which "dict" otherwise fills with image bytes
+        line_no = -1
+        for b in page.get_text("dict", flags=fitz.TEXTFLAGS_TEXT)["blocks"]:
+            for line in b.get("lines", ()):
+                line_no += 1
+                for span in line["spans"]:
+                    txt = span["text"].strip()
+                    if not txt:
+                        continue
+                    x0, y0, x1, y1 = span["bbox"]
+                    self.text.append(txt)
+                    self.line.append(line_no)
+                    self.x0.append(x0)
+                    self.y0.append(y0)
+                    self.x1.append(x1)
+                    self.y1.append(y1)
+                    self.size.append(span.get("size", 0))
+                    self.flags.append(span.get("flags", 0))
+
+    def __len__(self):
+        return len(self.text)
+
+    def rect(self, i):
+        return fitz.Rect(self.x0[i], self.y0[i], self.x1[i], self.y1[i])
+
+    def removal_mask(self):
+        """One bool per span: True where should_remove_text would remove it"""
+        max_area = self.page_area * MAX_LARGE_FONT_AREA_RATIO if self.page_area > 0 else float("inf")
+
+        # Font-size/area rule over whole columns at once
+        if np is not None and len(self):
+            x0, y0, x1, y1, size = (np.frombuffer(col, dtype=np.float64)
+                                    for col in (self.x0, self.y0, self.x1, self.y1, self.size))
+            large = ((size > LARGE_FONT_SIZE) & ((x1 - x0) * (y1 - y0) < max_area)).tolist()
+        else:
+            large = [size > LARGE_FONT_SIZE and (x1 - x0) * (y1 - y0) < max_area
+                     for x0, y0, x1, y1, size in zip(self.x0, self.y0, self.x1, self.y1, self.size)]
+
+        return [len(txt) >= 2 and (is_large or is_removable_text(txt))
+                for txt, is_large in zip(self.text, large)]
+
+def page_needs_ocr(page):
+    """Cheap check: the page shows images but has no extractable text layer"""
+    return bool(page.get_images()) and not page.get_text("text").strip()
+
+def page_hash(doc, page, dpi=OCR_DPI, lang=OCR_LANG):
+    """Hash the page content stream and its image data, without rendering"""
+    h = hashlib.sha1(f"{OCR_CACHE_VERSION}:{dpi}:{lang}:{page.rotation}".encode())
+    h.update(page.read_contents())
+    for img in page.get_images():
+        h.update(doc.xref_stream_raw(img[0]) or b"")
+    return h.hexdigest()
+
+def _is_word_record(word):
+    """[x0, y0, x1, y1, text, line_key, height] as written by _ocr_page"""
+    return (isinstance(word, list) and len(word) == 7 and
+            all(isinstance(v, (int, float)) and not isinstance(v, bool) for v in word[:4] + word[6:]) and
+            isinstance(word[4], str) and isinstance(word[5], str))
+
+def _load_cached_words(cache_dir, key):
+    path = os.path.join(cache_dir, f"{key}.json")
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            words = json.load(f)
+    except (OSError, ValueError):
+        return None
+    # Anything malformed is treated as a miss and re-OCR'd
+    if not isinstance(words, list) or not all(_is_word_record(w) for w in words):
+        return None
+    try:
+        os.utime(path)  # mark as recently used for eviction
+    except OSError:
+        pass
+    return words
+
+def _evict_cached_words(cache_dir, max_entries=OCR_CACHE_MAX_ENTRIES):
+    """Drop the least recently used entries once the cache grows past max_entries"""
+    try:
+        entries = [e for e in os.scandir(cache_dir) if e.name.endswith(".json")]
+    except OSError:
+        return
+    if len(entries) <= max_entries:
+        return
+    entries.sort(key=lambda e: e.stat().st_mtime)
+    for entry in entries[:len(entries) - max_entries]:
+        try:
+            os.remove(entry.path)
+        except OSError:
+            pass
+
+def _store_cached_words(cache_dir, key, words):
+    # Several processes may OCR the same page at once (e.g. batch_process
+    # running clean/text/lectures together): each writes its own temp file,
+    # and losing the race only means the entry is not cached this time
+    os.makedirs(cache_dir, mode=0o700, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(prefix=f"{key}.", suffix=".tmp", dir=cache_dir)
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(words, f)
+        os.replace(tmp_path, os.path.join(cache_dir, f"{key}.json"))
+    except OSError:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+
+_worker_doc = None
+
+def _init_ocr_worker(pdf_path):
+    global _worker_doc
+    _worker_doc = fitz.open(pdf_path)
+
+def _ocr_page(args):
+    """
+    Render one page and return its word boxes in PDF coordinates, plus the
+    word height measured upright (as rendered), which stands in for font size
+    """
+    page_num, dpi, lang = args
+    page = _worker_doc[page_num]
+    pix = page.get_pixmap(dpi=dpi, alpha=False)
+    img = Image.open(io.BytesIO(pix.tobytes("png")))
+    data = pytesseract.image_to_data(img, lang=lang, output_type=pytesseract.Output.DICT)
+
+    # Map pixel coordinates back onto the unrotated page, where redactions live
+    scale_x = page.rect.width / pix.width
+    scale_y = page.rect.height / pix.height
+    derotate = page.derotation_matrix
+
+    words = []
+    for i, txt in enumerate(data["text"]):
+        txt = txt.strip()
+        if not txt or float(data["conf"][i]) < OCR_MIN_CONFIDENCE:
+            continue
+        upright = fitz.Rect(
+            data["left"][i] * scale_x,
+            data["top"][i] * scale_y,
+            (data["left"][i] + data["width"][i]) * scale_x,
+            (data["top"][i] + data["height"][i]) * scale_y
+        )
+        # Derotated rect is for redaction only; on /Rotate 90/270 pages its
+        # height is the text's length, not its size
+        rect = upright * derotate
+        line_key = f"{data['block_num'][i]}.{data['par_num'][i]}.{data['line_num'][i]}"
+        words.append([rect.x0, rect.y0, rect.x1, rect.y1, txt, line_key, upright.height])
+    return page_num, words
+
+def ocr_pages(pdf_path, page_numbers, dpi=OCR_DPI, workers=None, lang=OCR_LANG, cache_dir=OCR_CACHE_DIR):
+    """
+    OCR the given pages across a process pool, reusing word boxes cached
+    per page hash. Returns {page_num: [[x0, y0, x1, y1, text, line_key, height], ...]}
+    """
+    results = {}
+    pending = {}
+
+    doc = fitz.open(pdf_path)
+    for page_num in page_numbers:
+        key = page_hash(doc, doc[page_num], dpi, lang)
+        cached = _load_cached_words(cache_dir, key)
+        if cached is not None:
+            results[page_num] = cached
+        else:
+            pending[page_num] = key
+    doc.close()
+
+    if not pending:
+        return results
+
+    tasks = [(page_num, dpi, lang) for page_num in pending]
+    if len(tasks) == 1 or workers == 1:
+        _init_ocr_worker(pdf_path)
+        try:
+            done = [_ocr_page(task) for task in tasks]
+        finally:
+            _worker_doc.close()
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_ocr_worker, initargs=(pdf_path,)) as pool:
+            done = list(pool.map(_ocr_page, tasks))
+
+    for page_num, words in done:
+        _store_cached_words(cache_dir, pending[page_num], words)
+        results[page_num] = words
+    _evict_cached_words(cache_dir)
+
+    return results
+
+def ocr_document(pdf_path, dpi=OCR_DPI, workers=None, lang=OCR_LANG, cache_dir=OCR_CACHE_DIR):
+    """OCR every page of the document that has no text layer"""
+    doc = fitz.open(pdf_path)
+    page_numbers = [page.number for page in doc if page_needs_ocr(page)]
+    doc.close()
+    if not page_numbers:
+        return {}
+    return ocr_pages(pdf_path, page_numbers, dpi, workers, lang, cache_dir)
+
+def group_ocr_lines(words):
+    """
+    Group OCR word boxes into lines: [(text, fitz.Rect, height), ...] in
+    reading order, where height is the tallest upright word in the line
+    """
+    lines = {}
+    for x0, y0, x1, y1, txt, line_key, height in words:
+        if line_key not in lines:
+            lines[line_key] = [[], fitz.Rect(x0, y0, x1, y1), 0]
+        lines[line_key][0].append(txt)
+        lines[line_key][1].include_rect(fitz.Rect(x0, y0, x1, y1))
+        lines[line_key][2] = max(lines[line_key][2], height)
+    return [(" ".join(parts), rect, height) for parts, rect, height in lines.values()]
+
+def clean_page_text(page, ocr_words=None):
+    """Return the lines of one page that survive the removal rules"""
+    page_area = page.rect.width * page.rect.height
+    page_text = []
+    
+    # Scanned page: run the OCR lines through the same removal rules
+    if ocr_words is not None:
+        for txt, rect, height in group_ocr_lines(ocr_words):
+            if not should_remove_text(txt, height, 0, rect.width * rect.height, page_area):
+                page_text.append(txt)
+        return page_text
+    
+    layout = PageLayout(page)
+    line_text = []
+    current_line = None
+    
+    # Only keep text that should NOT be removed, re-joined line by line
+    for txt, line_no, removed in zip(layout.text, layout.line, layout.removal_mask()):
+        if removed:
+            continue
+        if line_no != current_line and line_text:
+            page_text.append(" ".join(line_text))
+            line_text = []
+        current_line = line_no
+        line_text.append(txt)
+    
+    if line_text:
+        page_text.append(" ".join(line_text))
+    
+    return page_text
+
+def format_page_text(page_num, page_text):
+    """Tag a page's cleaned lines with its (0-based) page number"""
+    return f"\n--- Page {page_num + 1} ---\n" + "\n".join(page_text) + "\n" if page_text else ""
+
+def extract_clean_text(pdf_path, enable_ocr=False, ocr_dpi=OCR_DPI, ocr_workers=None):
     """Extract just the clean text without saving PDF"""
     try:
+        ocr_results = ocr_document(pdf_path, ocr_dpi, ocr_workers) if enable_ocr else {}
         doc = fitz.open(pdf_path)
         clean_text = ""
         
         for page_num, page in enumerate(doc):
-            page_area = page.rect.width * page.rect.height
-            blocks = page.get_text("dict")["blocks"]
-            
-            page_text = []
-            
-            for b in blocks:
-                if "lines" not in b:
-                    continue
-                    
-                for line in b["lines"]:
-                    line_text = []
-                    for span in line["spans"]:
-                        txt = span["text"].strip()
-                        if not txt:
-                            continue
-                            
-                        font_size = span.get("size", 0)
-                        flags = span.get("flags", 0)
-                        bbox = fitz.Rect(span["bbox"])
-                        bbox_area = bbox.width * bbox.height
-                        
-                        # Only keep text that should NOT be removed
-                        if not should_remove_text(txt, font_size, flags, bbox_area, page_area):
-                            line_text.append(txt)
-                    
-                    if line_text:
-                        page_text.append(" ".join(line_text))
-            
-            if page_text:
-                clean_text += f"\n--- Page {page_num + 1} ---\n" + "\n".join(page_text) + "\n"
+            clean_text += format_page_text(page_num, clean_page_text(page, ocr_results.get(page_num)))
         
         doc.close()
         return clean_text.strip()
@@ -119,17 +374,27 @@ def extract_clean_text(pdf_path):
     except Exception as e:
         raise Exception(f"Error extracting text: {str(e)}")
 
-def clean_pdf(input_path, output_path, enable_ocr=False):
+def clean_pdf(input_path, output_path, enable_ocr=False, ocr_dpi=OCR_DPI, ocr_workers=None):
     """Create a cleaned PDF version with watermarks removed"""
     try:
+        ocr_results = ocr_document(input_path, ocr_dpi, ocr_workers) if enable_ocr else {}
         doc = fitz.open(input_path)
         seen_images = set()
         
         for page_num, page in enumerate(doc):
             page_area = page.rect.width * page.rect.height
             
-            # Get all text blocks
-            blocks = page.get_text("dict")["blocks"]
+            # Scanned page: the page image is the content, so only blank out
+            # the pixels under OCR lines that match the removal rules
+            if page_num in ocr_results:
+                for txt, rect, height in group_ocr_lines(ocr_results[page_num]):
+                    if should_remove_text(txt, height, 0, rect.width * rect.height, page_area):
+                        page.add_redact_annot(rect + (-2, -2, 2, 2), fill=(1, 1, 1))
+                page.apply_redactions(images=fitz.PDF_REDACT_IMAGE_PIXELS)
+                continue
+            
+            # Get all text spans
+            layout = PageLayout(page)
             
             # Identify header/footer regions
             header_region = fitz.Rect(0, 0, page.rect.width, page.rect.height * 0.15)
@@ -137,27 +402,11 @@ def clean_pdf(input_path, output_path, enable_ocr=False):
             
             redaction_rects = []
             
-            # Process text blocks for removal
-            for b in blocks:
-                if "lines" not in b:
-                    continue
-                    
-                for line in b["lines"]:
-                    for span in line["spans"]:
-                        txt = span["text"].strip()
-                        if not txt:
-                            continue
-                            
-                        font_size = span.get("size", 0)
-                        flags = span.get("flags", 0)
-                        bbox = fitz.Rect(span["bbox"])
-                        bbox_area = bbox.width * bbox.height
-                        
-                        # Check if this text should be removed
-                        if should_remove_text(txt, font_size, flags, bbox_area, page_area):
-                            # Expand bbox slightly to ensure complete removal
-                            expanded_bbox = bbox + (-2, -2, 2, 2)
-                            redaction_rects.append(expanded_bbox)
+            # Process text spans for removal
+            for i, removed in enumerate(layout.removal_mask()):
+                if removed:
+                    # Expand bbox slightly to ensure complete removal
+                    redaction_rects.append(layout.rect(i) + (-2, -2, 2, 2))
             
             # Process images for potential removal
             image_list = page.get_images()
@@ -211,15 +460,18 @@ def clean_pdf(input_path, output_path, enable_ocr=False):
 
 if __name__ == "__main__":
     if len(sys.argv) < 3:
-        print(json.dumps({"error": "Usage: python process_pdf.py input.pdf output.pdf [--extract-text]"}))
+        print(json.dumps({"error": "Usage: python process_pdf.py input.pdf output.pdf [--extract-text] [--ocr] [--ocr-dpi N] [--ocr-workers N]"}))
         sys.exit(1)
     
     infile, outfile = sys.argv[1], sys.argv[2]
+    enable_ocr = "--ocr" in sys.argv
+    ocr_dpi = int(sys.argv[sys.argv.index("--ocr-dpi") + 1]) if "--ocr-dpi" in sys.argv else OCR_DPI
+    ocr_workers = int(sys.argv[sys.argv.index("--ocr-workers") + 1]) if "--ocr-workers" in sys.argv else None
     
     try:
         if "--extract-text" in sys.argv:
             # Extract and return clean text as JSON
-            text = extract_clean_text(infile)
+            text = extract_clean_text(infile, enable_ocr, ocr_dpi, ocr_workers)
             result = {
                 "success": True,
                 "text": text,
@@ -229,7 +481,7 @@ if __name__ == "__main__":
             print(json.dumps(result))
         else:
             # Create cleaned PDF
-            message = clean_pdf(infile, outfile, enable_ocr=False)
+            message = clean_pdf(infile, outfile, enable_ocr, ocr_dpi, ocr_workers)
             result = {
                 "success": True,
                 "message": message
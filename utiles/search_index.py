@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""
+Full-text search over handout text, backed by an SQLite FTS5 index.
+
+Usage:
+    python search_index.py add input.pdf [--text text.json] [--sections lectures.json] [--ocr] [--force]
+    python search_index.py remove input.pdf
+    python search_index.py query "search terms" [--limit N] [--raw]
+    python search_index.py list
+
+All commands take [--index path] (default: search_index.db). `add` indexes
+the extract_clean_text output page by page, tagging each page with its
+lecture from the parse_pdf section map; --text/--sections reuse existing
+outputs (e.g. from batch_process.py) instead of re-reading the PDF.
+Re-adding an unchanged handout is a no-op; a changed one is replaced.
+"""
+import sys
+import os
+import re
+import json
+import time
+import sqlite3
+
+DEFAULT_INDEX = "search_index.db"
+DEFAULT_LIMIT = 20
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS handouts (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    path TEXT UNIQUE NOT NULL,
+    mtime REAL NOT NULL,
+    pages INTEGER NOT NULL,
+    indexed_at REAL NOT NULL
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS page_text USING fts5(
+    content,
+    lecture UNINDEXED,
+    handout_id UNINDEXED,
+    page UNINDEXED,
+    tokenize = 'porter unicode61'
+);
+"""
+
+PAGE_MARKER = re.compile(r"^--- Page (\d+) ---$", re.MULTILINE)
+
+def open_index(index_path):
+    conn = sqlite3.connect(index_path)
+    conn.executescript(SCHEMA)
+    return conn
+
+def split_tagged_pages(text):
+    """Split extract_clean_text output into {page_num: text}"""
+    pages = {}
+    parts = PAGE_MARKER.split(text)
+    # parts = [before, page, text, page, text, ...]
+    for i in range(1, len(parts) - 1, 2):
+        pages[int(parts[i])] = parts[i + 1].strip()
+    return pages
+
+def lecture_for_pages(sections, total_pages):
+    """Map page_num -> lecture title, first matching section wins"""
+    lectures = {}
+    ordered = sorted(sections.items(), key=lambda item: item[1]["start_page"])
+    for title, pages in ordered:
+        for page_num in range(pages["start_page"], min(pages["end_page"], total_pages) + 1):
+            lectures.setdefault(page_num, title)
+    return lectures
+
+def extract_handout(pdf_path, enable_ocr=False):
+    """Run extract_clean_text and parse_pdf on the handout"""
+    # Imported lazily so querying the index does not need fitz/pdfplumber
+    from process_pdf import extract_clean_text
+    from parse_pdf import parse_pdf
+
+    return extract_clean_text(pdf_path, enable_ocr), parse_pdf(pdf_path, enable_ocr)
+
+def add_handout(conn, pdf_path, text=None, sections=None, enable_ocr=False, force=False):
+    """Index (or re-index) one handout; returns the number of pages indexed"""
+    path = os.path.abspath(pdf_path)
+    mtime = os.path.getmtime(path)
+
+    row = conn.execute("SELECT id, mtime, pages FROM handouts WHERE path = ?", (path,)).fetchone()
+    if row and row[1] == mtime and not force:
+        return row[2]
+
+    if text is None or sections is None:
+        extracted_text, extracted_sections = extract_handout(path, enable_ocr)
+        text = extracted_text if text is None else text
+        sections = extracted_sections if sections is None else sections
+
+    pages = split_tagged_pages(text)
+    lectures = lecture_for_pages(sections, max(pages, default=0))
+
+    with conn:
+        if row:
+            conn.execute("DELETE FROM page_text WHERE handout_id = ?", (row[0],))
+            conn.execute("DELETE FROM handouts WHERE id = ?", (row[0],))
+        handout_id = conn.execute(
+            "INSERT INTO handouts (path, mtime, pages, indexed_at) VALUES (?, ?, ?, ?)",
+            (path, mtime, len(pages), time.time())
+        ).lastrowid
+        conn.executemany(
+            "INSERT INTO page_text (content, lecture, handout_id, page) VALUES (?, ?, ?, ?)",
+            [(content, lectures.get(page_num, ""), handout_id, page_num)
+             for page_num, content in pages.items() if content]
+        )
+    return len(pages)
+
+def remove_handout(conn, pdf_path):
+    """Drop a handout from the index; returns True if it was indexed"""
+    path = os.path.abspath(pdf_path)
+    row = conn.execute("SELECT id FROM handouts WHERE path = ?", (path,)).fetchone()
+    if not row:
+        return False
+    with conn:
+        conn.execute("DELETE FROM page_text WHERE handout_id = ?", (row[0],))
+        conn.execute("DELETE FROM handouts WHERE id = ?", (row[0],))
+    return True
+
+def to_match_expression(terms):
+    """Quote each term so user input cannot break FTS5 query syntax"""
+    return " ".join('"' + term.replace('"', '""') + '"' for term in terms.split())
+
+def query_index(conn, terms, limit=DEFAULT_LIMIT, raw=False):
+    """Return the best-matching pages, best first"""
+    expression = terms if raw else to_match_expression(terms)
+    if not expression:
+        return []
+    rows = conn.execute(
+        """
+        SELECT h.path, p.lecture, p.page, bm25(page_text) AS score,
+               snippet(page_text, 0, '[', ']', '...', 12)
+        FROM page_text p JOIN handouts h ON h.id = p.handout_id
+        WHERE page_text MATCH ?
+        ORDER BY score
+        LIMIT ?
+        """,
+        (expression, limit)
+    ).fetchall()
+    return [
+        {"handout": path, "lecture": lecture, "page": page, "score": round(-score, 4), "snippet": snippet}
+        for path, lecture, page, score, snippet in rows
+    ]
+
+def list_handouts(conn):
+    rows = conn.execute("SELECT path, pages, indexed_at FROM handouts ORDER BY path").fetchall()
+    return [{"handout": path, "pages": pages, "indexed_at": indexed_at} for path, pages, indexed_at in rows]
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print(json.dumps({"error": "Usage: python search_index.py [add|remove|query|list] ... [--index path]"}))
+        sys.exit(1)
+
+    command = sys.argv[1]
+    index_path = sys.argv[sys.argv.index("--index") + 1] if "--index" in sys.argv else DEFAULT_INDEX
+
+    try:
+        conn = open_index(index_path)
+        if command == "add":
+            pdf_path = sys.argv[2]
+            if not os.path.exists(pdf_path):
+                print(json.dumps({"error": f"PDF file not found: {pdf_path}"}))
+                sys.exit(1)
+            text = sections = None
+            if "--text" in sys.argv:
+                with open(sys.argv[sys.argv.index("--text") + 1], "r", encoding="utf-8") as f:
+                    text = json.load(f)["text"]
+            if "--sections" in sys.argv:
+                with open(sys.argv[sys.argv.index("--sections") + 1], "r", encoding="utf-8") as f:
+                    sections = json.load(f)
+            pages = add_handout(conn, pdf_path, text, sections, "--ocr" in sys.argv, "--force" in sys.argv)
+            result = {"success": True, "pages": pages}
+        elif command == "remove":
+            result = {"success": remove_handout(conn, sys.argv[2])}
+        elif command == "query":
+            limit = int(sys.argv[sys.argv.index("--limit") + 1]) if "--limit" in sys.argv else DEFAULT_LIMIT
+            started = time.perf_counter()
+            matches = query_index(conn, sys.argv[2], limit, "--raw" in sys.argv)
+            result = {
+                "success": True,
+                "results": matches,
+                "ms": round((time.perf_counter() - started) * 1000, 2)
+            }
+        elif command == "list":
+            result = {"success": True, "handouts": list_handouts(conn)}
+        else:
+            result = {"error": f"Unknown command: {command}"}
+        conn.close()
+        print(json.dumps(result))
+    except Exception as e:
+        print(json.dumps({"success": False, "error": str(e)}))
+        sys.exit(1)
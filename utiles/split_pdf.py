@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Split a handout into per-lecture PDFs and cleaned text files.
+
+Usage:
+    python split_pdf.py input.pdf output_dir [--sections sections.json] [--no-text] [--ocr]
+    python split_pdf.py input.pdf output_dir --sections sections.json --lecture "Lecture 3"
+
+The section map is parse_pdf's {title: {start_page, end_page}} output
+(1-based, inclusive); if --sections is omitted parse_pdf is run over the
+whole document first. Pages are copied with insert_pdf, so nothing is
+re-rendered. --lecture requires --sections, so extracting one lecture only
+ever reads that lecture's pages.
+"""
+import sys
+import os
+import re
+import json
+import fitz  # PyMuPDF
+from process_pdf import clean_page_text, format_page_text, page_needs_ocr, ocr_pages
+
+def safe_filename(title):
+    return re.sub(r"[^\w\-]+", "_", title).strip("_") or "section"
+
+def split_pdf(pdf_path, sections, output_dir, with_text=True, enable_ocr=False):
+    """
+    Write one PDF (and one cleaned .txt) per section in a single pass over
+    the source. Returns {title: {"pdf", "text", "start_page", "end_page"}}.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    src = fitz.open(pdf_path)
+    total_pages = len(src)
+    results = {}
+
+    # Clamp ranges to the document and drop empty ones
+    ranges = []
+    for title, pages in sections.items():
+        start = max(int(pages["start_page"]), 1)
+        end = min(int(pages["end_page"]), total_pages)
+        if start <= end:
+            ranges.append((title, start - 1, end - 1))
+
+    ocr_results = {}
+    if with_text and enable_ocr:
+        needed = sorted({p for _, start, end in ranges for p in range(start, end + 1)})
+        scanned = [p for p in needed if page_needs_ocr(src[p])]
+        if scanned:
+            ocr_results = ocr_pages(pdf_path, scanned)
+
+    # Sections can share a boundary page; clean each page only once
+    page_text_cache = {}
+    used_names = set()
+
+    for title, start, end in ranges:
+        # Distinct titles can sanitize alike ("Topic 1:" / "Topic 1."), so
+        # prefix the start page and suffix any remaining clash
+        base_name = f"{start + 1:04d}_{safe_filename(title)}"
+        name, n = base_name, 2
+        while name in used_names:
+            name, n = f"{base_name}_{n}", n + 1
+        used_names.add(name)
+
+        out = fitz.open()
+        out.insert_pdf(src, from_page=start, to_page=end)
+        pdf_out = os.path.join(output_dir, f"{name}.pdf")
+        out.save(pdf_out, deflate=True, garbage=3)
+        out.close()
+
+        entry = {"pdf": pdf_out, "start_page": start + 1, "end_page": end + 1}
+
+        if with_text:
+            text = ""
+            for page_num in range(start, end + 1):
+                if page_num not in page_text_cache:
+                    page_text_cache[page_num] = format_page_text(
+                        page_num, clean_page_text(src[page_num], ocr_results.get(page_num))
+                    )
+                text += page_text_cache[page_num]
+            text_out = os.path.join(output_dir, f"{name}.txt")
+            with open(text_out, "w", encoding="utf-8") as f:
+                f.write(text.strip())
+            entry["text"] = text_out
+
+        results[title] = entry
+
+    src.close()
+    return results
+
+if __name__ == "__main__":
+    if len(sys.argv) < 3:
+        print(json.dumps({"error": "Usage: python split_pdf.py input.pdf output_dir [--sections sections.json [--lecture TITLE]] [--no-text] [--ocr]"}))
+        sys.exit(1)
+
+    pdf_path, output_dir = sys.argv[1], sys.argv[2]
+    enable_ocr = "--ocr" in sys.argv
+
+    if not os.path.exists(pdf_path):
+        print(json.dumps({"error": f"PDF file not found: {pdf_path}"}))
+        sys.exit(1)
+
+    # Without a section map, finding one lecture means parsing the whole book
+    if "--lecture" in sys.argv and "--sections" not in sys.argv:
+        print(json.dumps({"error": "--lecture requires --sections (save parse_pdf.py output first)"}))
+        sys.exit(1)
+
+    try:
+        if "--sections" in sys.argv:
+            with open(sys.argv[sys.argv.index("--sections") + 1], "r", encoding="utf-8") as f:
+                sections = json.load(f)
+        else:
+            from parse_pdf import parse_pdf
+            sections = parse_pdf(pdf_path, enable_ocr)
+
+        if "--lecture" in sys.argv:
+            wanted = sys.argv[sys.argv.index("--lecture") + 1]
+            if wanted not in sections:
+                print(json.dumps({"error": f"Section not found: {wanted}"}))
+                sys.exit(1)
+            sections = {wanted: sections[wanted]}
+
+        lectures = split_pdf(pdf_path, sections, output_dir, "--no-text" not in sys.argv, enable_ocr)
+        print(json.dumps({"success": True, "lectures": lectures}))
+    except Exception as e:
+        print(json.dumps({"success": False, "error": str(e)}))
+        sys.exit(1)